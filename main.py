@@ -1,27 +1,86 @@
 from astrbot.api.message_components import *
 from astrbot.api.event import filter, AstrMessageEvent, MessageEventResult
 from astrbot.api.star import Context, Star, register
+from astrbot.api import logger
 import aiohttp
+import asyncio
+import itertools
 import os
 import platform
+import shutil
+import ssl
 import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
+from stat import S_ISREG
 from urllib.parse import quote, unquote
 from typing import Dict, Optional
 
 # 服务器依赖（需提前安装：pip install flask waitress pyftpdlib wsgidav cheroot）
 try:
-    from flask import Flask, render_template_string, request, redirect, url_for, send_file
-    from waitress import serve
+    from flask import Flask, Response, request, redirect, url_for, send_from_directory, stream_with_context
+    from waitress import create_server, wasyncore
     from pyftpdlib.authorizers import DummyAuthorizer
     from pyftpdlib.handlers import FTPHandler
     from pyftpdlib.servers import ThreadedFTPServer
     from wsgidav.wsgidav_app import WsgiDAVApp
     from wsgidav.fs_dav_provider import FilesystemProvider
+    from cheroot import wsgi as cheroot_wsgi
+    from markupsafe import Markup, escape
     DEPENDENCIES_INSTALLED = True
 except ImportError:
     DEPENDENCIES_INSTALLED = False
 
+_IS_WINDOWS = platform.system() == "Windows"
+
+# /img 请求使用的SSL上下文（不校验证书，与原 verify_ssl=False 行为一致），只创建一次
+_SSL_CTX = ssl.create_default_context()
+_SSL_CTX.check_hostname = False
+_SSL_CTX.verify_mode = ssl.CERT_NONE
+
+# 可选：网页响应压缩（pip install flask-compress）
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# 可选：更快的JSON解析（pip install orjson），未安装时使用标准库
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Windows 下用于枚举驱动器（可选依赖：pip install pywin32）
+win32api = None
+if _IS_WINDOWS:
+    try:
+        import win32api
+    except ImportError:
+        pass
+
+# 目录页面缓存容量（条目数/总字节数）与有效期（秒）；目录内文件大小变化不会更新目录修改时间，
+# 因此缓存同时设置较短的有效期
+_DIR_CACHE_SIZE = 128
+_DIR_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_DIR_CACHE_TTL = 30
+
+@lru_cache(maxsize=256)
+def _resolve_browse_path(raw_path: str) -> Optional[str]:
+    """解码URL中的目录路径，非绝对路径返回None"""
+    current_path = unquote(raw_path)
+    return current_path if os.path.isabs(current_path) else None
+
+@lru_cache(maxsize=256)
+def _parent_of(path: str) -> Optional[str]:
+    """返回上级目录，根目录（含Windows驱动器根）返回None"""
+    if path == os.sep:
+        return None
+    drive, _ = os.path.splitdrive(path)
+    return None if path == drive + os.sep else os.path.dirname(path)
+
 @register("file_server", "本地文件服务器", "自动启动多协议文件服务器（HTTP/FTP/WebDAV），支持自定义目录浏览。\n使用 /img 获取随机图片。", "1.0")
 class FileServerPlugin(Star):
     def __init__(self, context: Context, config: dict):
@@ -34,17 +93,33 @@ class FileServerPlugin(Star):
         self.ftp_port = config.get("ftp_port", 2121)
         self.webdav_port = config.get("webdav_port", 8081)
         self.default_root = config.get("default_root", None)
+        self.http_threads = config.get("http_threads", 32)
+        self.http_backlog = config.get("http_backlog", 1024)
+        self.max_entries = config.get("max_entries", 1000)
+        
+        # 系统根目录在运行期间基本不变，加载时计算一次
+        self._system_roots = self._compute_system_roots()
+        # 各服务共用的根目录（未配置时取第一个系统根目录）
+        self._effective_root = self.default_root or next(iter(self._system_roots.values()))
         
         # 服务器状态管理
         self.server_threads: Dict[str, threading.Thread] = {}
         self.server_instances: Dict[str, any] = {}
         
+        # 目录页面缓存：路径 -> (目录修改时间, 过期时间, 适用的最小/最大条目上限, 页面内容)
+        self._dir_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._dir_cache_bytes = 0
+        self._dir_cache_lock = threading.Lock()
+        
+        # /img 共用的HTTP会话（首次使用时创建，复用连接池）
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        
         # ========== 插件加载时自动启动服务器 ==========
         if DEPENDENCIES_INSTALLED:
             self.start_servers()
-            print(f"\n✅ 文件服务器已自动启动！\n🌐 HTTP网页：http://localhost:{self.http_port}\n📁 FTP服务：ftp://localhost:{self.ftp_port}（匿名登录）\n🔗 WebDAV：http://localhost:{self.webdav_port}")
+            logger.info(f"\n✅ 文件服务器已自动启动！\n🌐 HTTP网页：http://localhost:{self.http_port}\n📁 FTP服务：ftp://localhost:{self.ftp_port}（匿名登录）\n🔗 WebDAV：http://localhost:{self.webdav_port}")
         else:
-            print("\n❌ 文件服务器依赖未安装，请执行：\npip install flask waitress pyftpdlib wsgidav cheroot\nWindows需额外安装：pip install pywin32")
+            logger.error("\n❌ 文件服务器依赖未安装，请执行：\npip install flask waitress pyftpdlib wsgidav cheroot\nWindows需额外安装：pip install pywin32")
 
     # ========== 原有图片功能（保留） ==========
     @filter.command("img")
@@ -57,51 +132,111 @@ class FileServerPlugin(Star):
             yield event.plain_result("\n请先在配置文件中设置API地址")
             return
             
-        ssl_context = aiohttp.TCPConnector(verify_ssl=False)
-        async with aiohttp.ClientSession(connector=ssl_context) as session:
-            try:
-                async with session.get(self.api_url) as response:
-                    content_type = response.headers.get('Content-Type', '')
-                    
-                    if 'application/json' in content_type:
-                        data = await response.json()
-                        if data.get("error"):
-                            yield event.plain_result(f"\n获取图片失败：{data['error']}")
-                            return
-                        if not data.get("data"):
-                            yield event.plain_result("\n未获取到图片")
-                            return
-                        image_data = data["data"][0]
-                        image_url = image_data["urls"]["original"]
-                    elif 'image' in content_type:
-                        image_url = str(response.url)
-                    else:
-                        yield event.plain_result(f"\n不支持的响应类型: {content_type}")
+        session = await self._get_session()
+        try:
+            async with session.get(self.api_url) as response:
+                content_type = response.headers.get('Content-Type', '')
+                
+                if 'application/json' in content_type:
+                    data = await response.json(loads=json_loads)
+                    if data.get("error"):
+                        yield event.plain_result(f"\n获取图片失败：{data['error']}")
                         return
-                    
-                    chain = [Image.fromURL(image_url)]
-                    yield event.chain_result(chain)
-                    
-            except Exception as e:
-                yield event.plain_result(f"\n请求失败: {str(e)}")
+                    if not data.get("data"):
+                        yield event.plain_result("\n未获取到图片")
+                        return
+                    image_data = data["data"][0]
+                    image_url = image_data["urls"]["original"]
+                elif 'image' in content_type:
+                    image_url = str(response.url)
+                else:
+                    yield event.plain_result(f"\n不支持的响应类型: {content_type}")
+                    return
+                
+                chain = [Image.fromURL(image_url)]
+                yield event.chain_result(chain)
+                
+        except Exception as e:
+            yield event.plain_result(f"\n请求失败: {str(e)}")
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取共用的HTTP会话，未创建或已关闭时重新创建"""
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(ssl=_SSL_CTX, limit=100, limit_per_host=30, ttl_dns_cache=300)
+            self._http_session = aiohttp.ClientSession(connector=connector)
+        return self._http_session
+
+    async def terminate(self):
+        """插件卸载时关闭HTTP会话并停止文件服务器"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+        await asyncio.to_thread(self.stop_servers)
 
     # ========== 服务器核心功能 ==========
     def get_system_roots(self):
+        """获取缓存的系统根目录"""
+        return self._system_roots
+
+    def _compute_system_roots(self):
         """适配系统根目录（Windows驱动器/Linux根）"""
-        if platform.system() == "Windows":
-            try:
-                import win32api
-                drives = win32api.GetLogicalDriveStrings().split('\000')[:-1]
-                return {drive[:2]: drive for drive in drives}
-            except ImportError:
+        if _IS_WINDOWS:
+            if win32api is None:
                 return {"C:\\": "C:\\"}
+            drives = win32api.GetLogicalDriveStrings().split('\000')[:-1]
+            return {drive[:2]: drive for drive in drives}
         else:
             return {"/": "/"}
 
+    def _get_cached_page(self, path, mtime, limit):
+        """取出缓存的目录页面，目录已修改、缓存过期或条目上限不匹配时返回None"""
+        with self._dir_cache_lock:
+            cached = self._dir_cache.get(path)
+            if cached is None:
+                return None
+            cached_mtime, expires_at, min_limit, max_limit, body = cached
+            if cached_mtime != mtime or expires_at < time.monotonic():
+                self._dir_cache_bytes -= len(body)
+                del self._dir_cache[path]
+                return None
+            if not min_limit <= limit <= max_limit:
+                return None
+            self._dir_cache.move_to_end(path)
+            return body
+
+    def _store_cached_page(self, path, mtime, min_limit, max_limit, body):
+        """缓存目录页面（每个目录一份），超出条目数或总字节数时淘汰最久未使用的条目"""
+        if len(body) > _DIR_CACHE_MAX_BYTES:
+            return
+        with self._dir_cache_lock:
+            old = self._dir_cache.pop(path, None)
+            if old is not None:
+                self._dir_cache_bytes -= len(old[-1])
+            self._dir_cache[path] = (mtime, time.monotonic() + _DIR_CACHE_TTL, min_limit, max_limit, body)
+            self._dir_cache_bytes += len(body)
+            while len(self._dir_cache) > _DIR_CACHE_SIZE or self._dir_cache_bytes > _DIR_CACHE_MAX_BYTES:
+                _, evicted = self._dir_cache.popitem(last=False)
+                self._dir_cache_bytes -= len(evicted[-1])
+
     def create_flask_app(self):
         """创建Flask网页应用（文件浏览器）"""
-        app = Flask(__name__)
+        class FileServerFlask(Flask):
+            # 样式和脚本为静态文件，浏览器长期缓存（内容变化时通过版本参数刷新）；
+            # 下载的文件仍按 ETag 重新验证
+            def get_send_file_max_age(self, filename):
+                if request.endpoint == "static":
+                    return 31536000
+                return super().get_send_file_max_age(filename)
+
+        app = FileServerFlask(__name__)
         app.secret_key = "astrbot_file_server"
+        # 模板内嵌在代码中，无需检查模板文件是否更新
+        app.config["TEMPLATES_AUTO_RELOAD"] = False
+        app.jinja_env.auto_reload = False
+        app.jinja_env.globals["static_version"] = str(int(max(
+            os.path.getmtime(os.path.join(app.static_folder, name))
+            for name in ("app.css", "app.js")
+        )))
 
         # 网页模板
         HTML_TEMPLATE = """
@@ -111,267 +246,9 @@ class FileServerPlugin(Star):
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <title>AstrBot文件浏览器 - {{ current_path }}</title>
-            <style>
-                * { box-sizing: border-box; }
-                body { 
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                    margin: 0; 
-                    padding: 20px; 
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    min-height: 100vh;
-                }
-                .container {
-                    max-width: 1200px;
-                    margin: 0 auto;
-                    background: rgba(255, 255, 255, 0.95);
-                    border-radius: 15px;
-                    box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-                    overflow: hidden;
-                }
-                .header {
-                    background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-                    color: white;
-                    padding: 30px;
-                    text-align: center;
-                }
-                .header h1 {
-                    margin: 0;
-                    font-size: 2.5em;
-                    font-weight: 300;
-                }
-                .nav { 
-                    margin: 20px; 
-                    padding: 20px; 
-                    background: #f8f9fa; 
-                    border-radius: 10px;
-                    border: 1px solid #e9ecef;
-                }
-                .nav-section {
-                    margin-bottom: 15px;
-                }
-                .nav-section:last-child {
-                    margin-bottom: 0;
-                }
-                .nav-section label {
-                    font-weight: 600;
-                    color: #495057;
-                    margin-bottom: 8px;
-                    display: block;
-                }
-                .file-list { 
-                    list-style: none; 
-                    padding: 0; 
-                    margin: 20px;
-                }
-                .file-list li { 
-                    padding: 15px; 
-                    border-bottom: 1px solid #e9ecef;
-                    display: flex;
-                    align-items: center;
-                    justify-content: space-between;
-                    transition: all 0.3s ease;
-                    border-radius: 8px;
-                    margin-bottom: 5px;
-                }
-                .file-list li:hover {
-                    background: #f8f9fa;
-                    transform: translateX(5px);
-                }
-                .file-info {
-                    display: flex;
-                    align-items: center;
-                    flex: 1;
-                }
-                .file-icon {
-                    margin-right: 15px;
-                    font-size: 1.5em;
-                }
-                .dir { 
-                    color: #007bff; 
-                    font-weight: 600; 
-                }
-                .file { 
-                    color: #495057; 
-                }
-                .file-actions {
-                    display: flex;
-                    gap: 10px;
-                }
-                .btn {
-                    padding: 8px 16px;
-                    border: none;
-                    border-radius: 6px;
-                    cursor: pointer;
-                    font-size: 14px;
-                    transition: all 0.3s ease;
-                    text-decoration: none;
-                    display: inline-block;
-                }
-                .btn-primary {
-                    background: #007bff;
-                    color: white;
-                }
-                .btn-primary:hover {
-                    background: #0056b3;
-                }
-                .btn-success {
-                    background: #28a745;
-                    color: white;
-                }
-                .btn-success:hover {
-                    background: #1e7e34;
-                }
-                .btn-danger {
-                    background: #dc3545;
-                    color: white;
-                }
-                .btn-danger:hover {
-                    background: #c82333;
-                }
-                .custom-dir { 
-                    margin: 20px; 
-                    padding: 20px; 
-                    background: #e3f2fd;
-                    border-radius: 10px;
-                    border-left: 4px solid #2196f3;
-                }
-                .upload-section {
-                    margin: 20px;
-                    padding: 20px;
-                    background: #e8f5e8;
-                    border-radius: 10px;
-                    border-left: 4px solid #28a745;
-                }
-                .upload-area {
-                    border: 2px dashed #28a745;
-                    border-radius: 8px;
-                    padding: 30px;
-                    text-align: center;
-                    transition: all 0.3s ease;
-                    cursor: pointer;
-                }
-                .upload-area:hover {
-                    background: rgba(40, 167, 69, 0.1);
-                }
-                .upload-area.dragover {
-                    background: rgba(40, 167, 69, 0.2);
-                    border-color: #1e7e34;
-                }
-                input[type="text"], input[type="file"] {
-                    padding: 10px;
-                    border: 1px solid #ced4da;
-                    border-radius: 6px;
-                    font-size: 14px;
-                    width: 100%;
-                    margin-bottom: 10px;
-                }
-                input[type="text"]:focus {
-                    outline: none;
-                    border-color: #007bff;
-                    box-shadow: 0 0 0 3px rgba(0,123,255,0.1);
-                }
-                .path-input-group {
-                    display: flex;
-                    gap: 10px;
-                    align-items: center;
-                }
-                .path-input-group input {
-                    flex: 1;
-                    margin-bottom: 0;
-                }
-                .root-links {
-                    display: flex;
-                    flex-wrap: wrap;
-                    gap: 10px;
-                }
-                .root-links a {
-                    padding: 8px 12px;
-                    background: #007bff;
-                    color: white;
-                    text-decoration: none;
-                    border-radius: 6px;
-                    font-size: 14px;
-                    transition: background 0.3s ease;
-                }
-                .root-links a:hover {
-                    background: #0056b3;
-                }
-                .current-path {
-                    font-family: 'Courier New', monospace;
-                    background: #f8f9fa;
-                    padding: 10px;
-                    border-radius: 6px;
-                    border: 1px solid #e9ecef;
-                    word-break: break-all;
-                }
-                .file-size {
-                    color: #6c757d;
-                    font-size: 14px;
-                }
-                .progress-bar {
-                    width: 100%;
-                    height: 4px;
-                    background: #e9ecef;
-                    border-radius: 2px;
-                    overflow: hidden;
-                    margin-top: 10px;
-                }
-                .progress-fill {
-                    height: 100%;
-                    background: #28a745;
-                    width: 0%;
-                    transition: width 0.3s ease;
-                }
-                .upload-list {
-                    margin-top: 15px;
-                    max-height: 200px;
-                    overflow-y: auto;
-                }
-                .upload-item {
-                    display: flex;
-                    justify-content: space-between;
-                    align-items: center;
-                    padding: 8px;
-                    background: white;
-                    border-radius: 4px;
-                    margin-bottom: 5px;
-                }
-                .upload-item-name {
-                    flex: 1;
-                    font-size: 14px;
-                }
-                .upload-item-size {
-                    color: #6c757d;
-                    font-size: 12px;
-                    margin-left: 10px;
-                }
-                .upload-item-remove {
-                    background: #dc3545;
-                    color: white;
-                    border: none;
-                    padding: 4px 8px;
-                    border-radius: 4px;
-                    cursor: pointer;
-                    font-size: 12px;
-                }
-                @media (max-width: 768px) {
-                    .container {
-                        margin: 10px;
-                        border-radius: 10px;
-                    }
-                    .header h1 {
-                        font-size: 2em;
-                    }
-                    .path-input-group {
-                        flex-direction: column;
-                    }
-                    .path-input-group button {
-                        width: 100%;
-                    }
-                }
-            </style>
+            <link rel="stylesheet" href="{{ url_for('static', filename='app.css', v=static_version) }}">
         </head>
-        <body>
+        <body data-current-path="{{ current_path }}">
             <div class="container">
                 <div class="header">
                     <h1>🚀 AstrBot 本地文件服务器</h1>
@@ -394,9 +271,7 @@ class FileServerPlugin(Star):
                     <div class="nav-section">
                         <label>🖥️ 系统根目录</label>
                         <div class="root-links">
-                            {% for name, path in system_roots.items() %}
-                                <a href="{{ url_for('browse', path=quote(path)) }}">{{ name }}</a>
-                            {% endfor %}
+                            {{ nav_html }}
                         </div>
                     </div>
                     
@@ -425,7 +300,7 @@ class FileServerPlugin(Star):
                         <li>
                             <div class="file-info">
                                 <span class="file-icon">📁</span>
-                                <a href="{{ url_for('browse', path=quote(parent_path)) }}" class="dir">../ (上级目录)</a>
+                                <a href="{{ parent_path | browse_url }}" class="dir">../ (上级目录)</a>
                             </div>
                         </li>
                     {% endif %}
@@ -434,128 +309,31 @@ class FileServerPlugin(Star):
                             <div class="file-info">
                                 <span class="file-icon">{{ '📁' if item.is_dir else '📄' }}</span>
                                 {% if item.is_dir %}
-                                    <a href="{{ url_for('browse', path=quote(item.path)) }}" class="dir">{{ item.name }}/</a>
+                                    <a href="{{ item.url }}" class="dir">{{ item.name }}/</a>
                                 {% else %}
                                     <span class="file">{{ item.name }}</span>
-                                    <span class="file-size">({{ item.size | filesizeformat }})</span>
+                                    {% if item.url %}
+                                        <span class="file-size">({{ item.size | filesizeformat }})</span>
+                                    {% endif %}
                                 {% endif %}
                             </div>
                             <div class="file-actions">
-                                {% if not item.is_dir %}
-                                    <a href="{{ url_for('download', path=quote(item.path)) }}" class="btn btn-success">下载</a>
+                                {% if item.url and not item.is_dir %}
+                                    <a href="{{ item.url }}" class="btn btn-success">下载</a>
                                 {% endif %}
                             </div>
                         </li>
                     {% endfor %}
                 </ul>
+                {% if listing.truncated %}
+                    <div class="truncated-note">
+                        仅显示前 {{ listing.limit }} 项
+                        <a href="?limit={{ listing.limit * 2 }}" class="btn btn-primary">显示更多</a>
+                    </div>
+                {% endif %}
             </div>
 
-            <script>
-                const uploadArea = document.getElementById('uploadArea');
-                const fileInput = document.getElementById('fileInput');
-                const uploadList = document.getElementById('uploadList');
-                const progressFill = document.getElementById('progressFill');
-                let selectedFiles = [];
-
-                // 拖拽上传
-                uploadArea.addEventListener('dragover', (e) => {
-                    e.preventDefault();
-                    uploadArea.classList.add('dragover');
-                });
-
-                uploadArea.addEventListener('dragleave', () => {
-                    uploadArea.classList.remove('dragover');
-                });
-
-                uploadArea.addEventListener('drop', (e) => {
-                    e.preventDefault();
-                    uploadArea.classList.remove('dragover');
-                    handleFiles(e.dataTransfer.files);
-                });
-
-                fileInput.addEventListener('change', (e) => {
-                    handleFiles(e.target.files);
-                });
-
-                function handleFiles(files) {
-                    for (let file of files) {
-                        if (!selectedFiles.find(f => f.name === file.name)) {
-                            selectedFiles.push(file);
-                        }
-                    }
-                    updateUploadList();
-                }
-
-                function updateUploadList() {
-                    uploadList.innerHTML = '';
-                    selectedFiles.forEach((file, index) => {
-                        const item = document.createElement('div');
-                        item.className = 'upload-item';
-                        item.innerHTML = `
-                            <span class="upload-item-name">${file.name}</span>
-                            <span class="upload-item-size">${formatFileSize(file.size)}</span>
-                            <button class="upload-item-remove" onclick="removeFile(${index})">删除</button>
-                        `;
-                        uploadList.appendChild(item);
-                    });
-                }
-
-                function removeFile(index) {
-                    selectedFiles.splice(index, 1);
-                    updateUploadList();
-                }
-
-                function formatFileSize(bytes) {
-                    if (bytes === 0) return '0 Bytes';
-                    const k = 1024;
-                    const sizes = ['Bytes', 'KB', 'MB', 'GB'];
-                    const i = Math.floor(Math.log(bytes) / Math.log(k));
-                    return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
-                }
-
-                async function uploadFiles() {
-                    if (selectedFiles.length === 0) {
-                        alert('请先选择文件');
-                        return;
-                    }
-
-                    const currentPath = '{{ current_path }}';
-                    let totalUploaded = 0;
-                    const totalSize = selectedFiles.reduce((sum, file) => sum + file.size, 0);
-
-                    for (let file of selectedFiles) {
-                        const formData = new FormData();
-                        formData.append('file', file);
-                        formData.append('current_path', currentPath);
-
-                        try {
-                            const response = await fetch('/upload', {
-                                method: 'POST',
-                                body: formData
-                            });
-
-                            if (response.ok) {
-                                totalUploaded += file.size;
-                                progressFill.style.width = (totalUploaded / totalSize * 100) + '%';
-                            } else {
-                                alert(`上传 ${file.name} 失败`);
-                            }
-                        } catch (error) {
-                            alert(`上传 ${file.name} 时发生错误: ${error.message}`);
-                        }
-                    }
-
-                    // 上传完成
-                    setTimeout(() => {
-                        progressFill.style.width = '0%';
-                        selectedFiles = [];
-                        updateUploadList();
-                        fileInput.value = '';
-                        // 刷新页面显示新上传的文件
-                        window.location.reload();
-                    }, 1000);
-                }
-            </script>
+            <script src="{{ url_for('static', filename='app.js', v=static_version) }}"></script>
         </body>
         </html>
         """
@@ -571,44 +349,168 @@ class FileServerPlugin(Star):
                 size /= 1024.0
             return f"{size:.1f} PB"
 
-        @app.route("/", methods=["GET", "POST"])
-        @app.route("/browse/<path:path>", methods=["GET", "POST"])
-        def browse(path=None):
+        # 目录页面启用 gzip/brotli 压缩；下载和静态文件不压缩
+        compress = None
+        if Compress is not None:
+            app.config["COMPRESS_REGISTER"] = False
+            app.config["COMPRESS_MIMETYPES"] = ["text/html", "text/css", "application/javascript", "application/json"]
+            app.config["COMPRESS_LEVEL"] = 5
+            app.config["COMPRESS_MIN_SIZE"] = 1024
+            compress = Compress(app)
+
+        def compressed(view):
+            return compress.compressed()(view) if compress is not None else view
+
+        # 直接拼接浏览/下载地址，避免列表中每个条目都调用 url_for；
+        # 与 url_for 结果一致：路径先转义一次，再按 Werkzeug 的路径段规则转义
+        browse_prefix = "/browse/"
+        download_prefix = "/download/"
+
+        def build_url(prefix, path):
+            return prefix + quote(quote(path), safe="!$&'()*+,/:;=@")
+
+        @app.template_filter('browse_url')
+        def browse_url(path):
+            return build_url(browse_prefix, path)
+
+        # 系统根目录导航每个页面都相同，启动时生成一次并注册为模板全局变量
+        app.jinja_env.globals["nav_html"] = Markup("".join(
+            f'<a href="{escape(build_url(browse_prefix, path))}">{escape(name)}</a>'
+            for name, path in self._system_roots.items()
+        ))
+
+        # 模板只编译一次（需在注册过滤器之后），避免每次请求重新查找/编译
+        browse_template = app.jinja_env.from_string(HTML_TEMPLATE)
+
+        # 超过该条目数的目录不再排序，按遍历顺序边读边输出
+        sort_limit = 5000
+
+        def make_item(entry):
+            # DirEntry 已缓存类型信息，目录无需 stat；其余条目只取一次 stat
+            is_dir = entry.is_dir()
+            size = "-"
+            if not is_dir:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    st = None  # 失效的符号链接等
+                if st is not None and S_ISREG(st.st_mode):
+                    size = st.st_size
+            return {
+                "name": entry.name,
+                "path": entry.path,
+                "url": build_url(browse_prefix if is_dir else download_prefix, entry.path),
+                "is_dir": is_dir,
+                "size": size
+            }
+
+        def load_items(dir_path, limit):
+            """列出目录内容，最多 limit 项，目录不存在等错误向上抛出
+
+            返回 (条目, 列表状态)。条目不超过 sort_limit 时为排序好的列表（目录在前，
+            按名称排序），否则为按遍历顺序产出条目的生成器，避免一次性占用大量内存。
+            列表状态中的 truncated 表示是否因超出上限而省略了部分条目。
+            """
+            listing = {"limit": limit, "truncated": False}
+            try:
+                it = os.scandir(dir_path)
+            except PermissionError:
+                # 提示行没有链接，模板不显示大小和下载按钮
+                return [{"name": "权限不足，无法访问", "is_dir": False, "size": "-", "url": None}], listing
+            try:
+                head = list(itertools.islice(it, min(limit, sort_limit) + 1))
+            except BaseException:
+                it.close()
+                raise
+            
+            if len(head) <= sort_limit or limit <= sort_limit:
+                it.close()
+                if len(head) > limit:
+                    del head[limit:]
+                    listing["truncated"] = True
+                # 遍历时顺带生成排序键 (非目录, casefold 后的名称, 条目)
+                keyed = []
+                for entry in head:
+                    item = make_item(entry)
+                    keyed.append((not item["is_dir"], entry.name.casefold(), item))
+                keyed.sort(key=itemgetter(0, 1))
+                return [item for _, _, item in keyed], listing
+            
+            def iter_items():
+                with it:
+                    for count, entry in enumerate(itertools.chain(head, it)):
+                        if count == limit:
+                            listing["truncated"] = True
+                            break
+                        yield make_item(entry)
+            return iter_items(), listing
+
+        def render_browse(current_path):
+            """处理目录跳转表单并渲染目录页面"""
             if request.method == "POST":
                 custom_dir = request.form.get("custom_dir", "").strip()
                 if os.path.isdir(custom_dir):
                     return redirect(url_for("browse", path=quote(custom_dir)))
             
-            if path is None:
-                current_path = next(iter(self.get_system_roots().values()))
-            else:
-                current_path = unquote(path)
-                if not os.path.isabs(current_path) or not os.path.exists(current_path):
-                    current_path = next(iter(self.get_system_roots().values()))
+            # 默认最多显示 max_entries 项，可通过 ?limit= 查看更多
+            limit = max(request.args.get("limit", 0, type=int), self.max_entries)
             
-            parent_path = os.path.dirname(current_path) if current_path != os.path.splitdrive(current_path)[0] + os.sep else None
+            # 目录修改时间未变时直接返回缓存的页面
+            try:
+                mtime = os.stat(current_path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime is not None:
+                body = self._get_cached_page(current_path, mtime, limit)
+                if body is not None:
+                    return Response(body, mimetype="text/html")
             
+            # 不预先检查路径是否存在，由 scandir 报错后回退到系统根目录
             try:
-                items = []
-                for entry in os.scandir(current_path):
-                    items.append({
-                        "name": entry.name,
-                        "path": entry.path,
-                        "is_dir": entry.is_dir(),
-                        "size": entry.stat().st_size if entry.is_file() else "-"
-                    })
-                items.sort(key=lambda x: (not x["is_dir"], x["name"].lower()))
-            except PermissionError:
-                items = [{"name": "权限不足，无法访问", "is_dir": False}]
+                items, listing = load_items(current_path, limit)
+            except OSError:
+                current_path = self._effective_root
+                try:
+                    items, listing = load_items(current_path, limit)
+                except OSError:
+                    # 配置的默认根目录不可用时使用系统根目录
+                    current_path = next(iter(self._system_roots.values()))
+                    items, listing = load_items(current_path, limit)
+                mtime = None
+            
+            parent_path = _parent_of(current_path)
+            
+            context = {
+                "current_path": current_path,
+                "parent_path": parent_path,
+                "items": items,
+                "listing": listing
+            }
+            if isinstance(items, list):
+                body = browse_template.render(**context).encode("utf-8")
+                if mtime is not None:
+                    # 完整列表对任何不小于条目数的上限都相同，截断的列表只对应当前上限
+                    if listing["truncated"]:
+                        self._store_cached_page(current_path, mtime, limit, limit, body)
+                    else:
+                        self._store_cached_page(current_path, mtime, len(items), float("inf"), body)
+                return Response(body, mimetype="text/html")
             
-            return render_template_string(
-                HTML_TEMPLATE,
-                current_path=current_path,
-                parent_path=parent_path,
-                items=items,
-                system_roots=self.get_system_roots(),
-                quote=quote
-            )
+            # 超大目录边渲染边发送，无需拼出完整页面再返回（不缓存）
+            stream = browse_template.stream(**context)
+            stream.enable_buffering(64)
+            return Response(stream_with_context(stream), mimetype="text/html")
+
+        @app.route("/", methods=["GET", "POST"])
+        @compressed
+        def index():
+            return render_browse(self._effective_root)
+
+        @app.route("/browse/<path:path>", methods=["GET", "POST"])
+        @compressed
+        def browse(path):
+            # 非绝对路径回退到根目录
+            return render_browse(_resolve_browse_path(path) or self._effective_root)
 
         @app.route("/upload", methods=["POST"])
         def upload():
@@ -634,7 +536,9 @@ class FileServerPlugin(Star):
                     # 确保保存路径在当前目录或子目录内
                     try:
                         os.makedirs(current_path, exist_ok=True)
-                        file.save(save_path)
+                        # 按 1MB 分块写入，减少大文件的读写次数
+                        with open(save_path, "wb") as dest:
+                            shutil.copyfileobj(file.stream, dest, 1024 * 1024)
                         return "上传成功", 200
                     except Exception as e:
                         return f"保存失败: {str(e)}", 500
@@ -653,22 +557,34 @@ class FileServerPlugin(Star):
                 directory = os.path.dirname(current_path)
                 filename = os.path.basename(current_path)
                 
-                return send_file(current_path, as_attachment=True, download_name=filename)
+                # 支持 Range/If-None-Match 等条件请求，便于断点续传和浏览器缓存
+                return send_from_directory(directory, filename, as_attachment=True, conditional=True, etag=True)
                 
             except Exception as e:
                 return f"下载失败: {str(e)}", 500
 
         return app
 
-    def run_http_server(self):
-        """启动多线程HTTP服务"""
+    def create_http_server(self):
+        """创建多线程HTTP服务（创建时即绑定端口）"""
         app = self.create_flask_app()
-        serve(app, host="0.0.0.0", port=self.http_port, threads=10)
-
-    def run_ftp_server(self):
-        """启动多线程FTP服务"""
+        return create_server(
+            app,
+            host="0.0.0.0",
+            port=self.http_port,
+            threads=self.http_threads,
+            backlog=self.http_backlog,
+            connection_limit=1000,
+            channel_timeout=120,
+            cleanup_interval=30,
+            # 使用 poll 代替 select，并发连接数不受 select 的 1024 文件描述符上限限制
+            asyncore_use_poll=True
+        )
+
+    def create_ftp_server(self):
+        """创建多线程FTP服务（创建时即绑定端口）"""
         authorizer = DummyAuthorizer()
-        root_dir = self.default_root or next(iter(self.get_system_roots().values()))
+        root_dir = self._effective_root
         authorizer.add_anonymous(root_dir, perm="elradfmw")
         
         handler = FTPHandler
@@ -676,36 +592,70 @@ class FileServerPlugin(Star):
         handler.banner = "AstrBot文件服务器 - FTP服务"
         
         server = ThreadedFTPServer(("0.0.0.0", self.ftp_port), handler)
-        self.server_instances["ftp"] = server
-        server.serve_forever()
+        # 每个连接占用一个线程，限制连接数以约束线程数和内存
+        server.max_cons = 256
+        return server
 
-    def run_webdav_server(self):
-        """启动多线程WebDAV服务"""
-        root_dir = self.default_root or next(iter(self.get_system_roots().values()))
+    def create_webdav_server(self):
+        """创建多线程WebDAV服务（prepare 时绑定端口）"""
+        root_dir = self._effective_root
         provider = FilesystemProvider(root_dir)
         
         dav_config = {
             "provider_mapping": {"/": provider},
-            "user_mapping": {},
+            "simple_dc": {"user_mapping": {"*": True}},  # 匿名访问
             "verbose": 0,
-            "host": "0.0.0.0",
-            "port": self.webdav_port,
-            "server": "cheroot",
-            "cheroot_config": {"numthreads": 10}
+            # 文件读写块大小 1MB，减少大文件传输时的读写次数
+            "block_size": 1024 * 1024
         }
         
         app = WsgiDAVApp(dav_config)
-        app.run()
+        server = cheroot_wsgi.Server(
+            ("0.0.0.0", self.webdav_port), app,
+            numthreads=64, request_queue_size=500
+        )
+        server.prepare()
+        return server
 
     def start_servers(self):
         """自动启动所有服务器线程"""
-        # HTTP服务线程
-        self.server_threads["http"] = threading.Thread(target=self.run_http_server, daemon=True)
-        # FTP服务线程
-        self.server_threads["ftp"] = threading.Thread(target=self.run_ftp_server, daemon=True)
-        # WebDAV服务线程
-        self.server_threads["webdav"] = threading.Thread(target=self.run_webdav_server, daemon=True)
+        # 服务对象在启动线程前创建并登记，保证 stop_servers 总能停止已启动的服务；
+        # 服务线程在插件运行期间常驻（卸载时由 stop_servers 停止），使用守护线程以免阻塞进程退出
+        servers = (
+            ("http", self.create_http_server, "run"),
+            ("ftp", self.create_ftp_server, "serve_forever"),
+            ("webdav", self.create_webdav_server, "serve"),
+        )
+        for name, create, serve in servers:
+            try:
+                server = create()
+            except Exception as e:
+                logger.error(f"启动{name}服务失败: {e}")
+                continue
+            self.server_instances[name] = server
+            self.server_threads[name] = threading.Thread(target=getattr(server, serve), name=f"fs-{name}", daemon=True)
         
         # 启动所有线程
         for t in self.server_threads.values():
             t.start()
+
+    def stop_servers(self):
+        """停止所有服务器并等待服务线程退出，释放监听端口"""
+        for name, server in list(self.server_instances.items()):
+            try:
+                if name == "http":
+                    # 停止工作线程并关闭所有连接（含长连接），事件循环随之退出；
+                    # task_dispatcher 与 _map 为 waitress 内部属性，已在 waitress 2.1.x 与 3.0.x 上验证
+                    server.task_dispatcher.shutdown()
+                    wasyncore.close_all(server._map)
+                elif name == "ftp":
+                    server.close_all()
+                elif name == "webdav":
+                    server.stop()
+            except Exception as e:
+                logger.warning(f"停止{name}服务失败: {e}")
+        self.server_instances.clear()
+        
+        for t in self.server_threads.values():
+            t.join(timeout=5)
+        self.server_threads.clear()
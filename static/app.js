@@ -0,0 +1,120 @@
+const uploadArea = document.getElementById('uploadArea');
+const fileInput = document.getElementById('fileInput');
+const uploadList = document.getElementById('uploadList');
+const progressFill = document.getElementById('progressFill');
+let selectedFiles = [];
+const selectedNames = new Set();
+
+// 拖拽上传
+uploadArea.addEventListener('dragover', (e) => {
+    e.preventDefault();
+    uploadArea.classList.add('dragover');
+});
+
+uploadArea.addEventListener('dragleave', () => {
+    uploadArea.classList.remove('dragover');
+});
+
+uploadArea.addEventListener('drop', (e) => {
+    e.preventDefault();
+    uploadArea.classList.remove('dragover');
+    handleFiles(e.dataTransfer.files);
+});
+
+fileInput.addEventListener('change', (e) => {
+    handleFiles(e.target.files);
+});
+
+function handleFiles(files) {
+    for (let file of files) {
+        if (!selectedNames.has(file.name)) {
+            selectedNames.add(file.name);
+            selectedFiles.push(file);
+        }
+    }
+    updateUploadList();
+}
+
+function updateUploadList() {
+    uploadList.innerHTML = '';
+    selectedFiles.forEach((file, index) => {
+        const item = document.createElement('div');
+        item.className = 'upload-item';
+        item.innerHTML = `
+            <span class="upload-item-name">${file.name}</span>
+            <span class="upload-item-size">${formatFileSize(file.size)}</span>
+            <button class="upload-item-remove" onclick="removeFile(${index})">删除</button>
+        `;
+        uploadList.appendChild(item);
+    });
+}
+
+function removeFile(index) {
+    selectedNames.delete(selectedFiles[index].name);
+    selectedFiles.splice(index, 1);
+    updateUploadList();
+}
+
+function formatFileSize(bytes) {
+    if (bytes === 0) return '0 Bytes';
+    const k = 1024;
+    const sizes = ['Bytes', 'KB', 'MB', 'GB'];
+    const i = Math.floor(Math.log(bytes) / Math.log(k));
+    return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
+}
+
+async function uploadFiles() {
+    if (selectedFiles.length === 0) {
+        alert('请先选择文件');
+        return;
+    }
+
+    const currentPath = document.body.dataset.currentPath;
+    let totalUploaded = 0;
+    const totalSize = selectedFiles.reduce((sum, file) => sum + file.size, 0);
+
+    // 同时上传的文件数
+    const CONCURRENCY = 4;
+    let next = 0;
+
+    async function uploadOne(file) {
+        const formData = new FormData();
+        formData.append('file', file);
+        formData.append('current_path', currentPath);
+
+        try {
+            const response = await fetch('/upload', {
+                method: 'POST',
+                body: formData
+            });
+
+            if (response.ok) {
+                totalUploaded += file.size;
+                progressFill.style.width = (totalUploaded / totalSize * 100) + '%';
+            } else {
+                alert(`上传 ${file.name} 失败`);
+            }
+        } catch (error) {
+            alert(`上传 ${file.name} 时发生错误: ${error.message}`);
+        }
+    }
+
+    async function worker() {
+        while (next < selectedFiles.length) {
+            await uploadOne(selectedFiles[next++]);
+        }
+    }
+
+    await Promise.all(Array.from({ length: CONCURRENCY }, worker));
+
+    // 上传完成
+    setTimeout(() => {
+        progressFill.style.width = '0%';
+        selectedFiles = [];
+        selectedNames.clear();
+        updateUploadList();
+        fileInput.value = '';
+        // 刷新页面显示新上传的文件
+        window.location.reload();
+    }, 1000);
+}